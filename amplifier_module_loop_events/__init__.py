@@ -6,10 +6,17 @@ Trusts LLM decisions with optional scheduler veto/modification.
 # Amplifier module metadata
 __amplifier_module_type__ = "orchestrator"
 
+import asyncio
+import contextvars
+import functools
 import logging
+import sys
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 from amplifier_core import HookRegistry
+from amplifier_core import HookResult
 from amplifier_core import ModuleCoordinator
 from amplifier_core import ToolResult
 from amplifier_core.events import ORCHESTRATOR_COMPLETE
@@ -22,6 +29,54 @@ from amplifier_core.message_models import ToolSpec
 
 logger = logging.getLogger(__name__)
 
+# Shared result for events nobody subscribed to; treat as read-only
+_NOOP_RESULT = HookResult(action="continue")
+
+# System message appended when max_iterations is reached without a final response
+_MAX_ITERATIONS_REMINDER = """<system-reminder>
+You have reached the maximum number of iterations for this turn. Please provide a response to the user now, summarizing your progress and noting what remains to be done. You can continue in the next turn if needed.
+</system-reminder>"""
+
+
+def fast_event_loop_factory() -> Callable[[], asyncio.AbstractEventLoop] | None:
+    """
+    Return uvloop's event loop factory if uvloop is available.
+
+    Pass the result to asyncio.Runner(loop_factory=...) (or asyncio.run(..., loop_factory=...)
+    on Python 3.12+) to run the host's loop on uvloop without touching process-wide state.
+
+    Returns:
+        uvloop.new_event_loop, or None on Windows or when uvloop is not installed
+    """
+    if sys.platform == "win32":
+        return None
+    try:
+        import uvloop
+    except ImportError:
+        logger.debug("uvloop not installed, keeping default event loop")
+        return None
+    return uvloop.new_event_loop
+
+
+def install_fast_event_loop() -> bool:
+    """
+    Install uvloop as the asyncio event loop policy if it is available.
+
+    The policy applies to every event loop the process creates afterwards, so host
+    applications should call this before starting their loop. Event loop policies are
+    deprecated from Python 3.14; prefer fast_event_loop_factory() there.
+
+    Returns:
+        True if uvloop was installed, False otherwise
+    """
+    if fast_event_loop_factory() is None:
+        return False
+    import uvloop
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("Installed uvloop event loop policy")
+    return True
+
 
 async def mount(coordinator: ModuleCoordinator, config: dict[str, Any] | None = None):
     """
@@ -38,7 +93,87 @@ async def mount(coordinator: ModuleCoordinator, config: dict[str, Any] | None =
     orchestrator = EventDrivenOrchestrator(config)
     await coordinator.mount("orchestrator", orchestrator)
     logger.info("Mounted EventDrivenOrchestrator")
-    return
+
+    async def cleanup():
+        orchestrator.close()
+
+    return cleanup
+
+
+async def _emit(hooks: HookRegistry, event: str, data: dict[str, Any]) -> HookResult:
+    """
+    Emit an event, skipping the hook dispatch when no handler is registered for it.
+
+    Registries without list_handlers() (e.g. test recorders) always receive the event.
+    Subscriptions are checked on every call so handlers registered mid-session still fire.
+
+    Args:
+        hooks: Hook registry
+        event: Event name
+        data: Event payload
+
+    Returns:
+        Hook result from the registry, or a shared no-op result
+    """
+    if _has_handlers(hooks, event) is False:
+        return _NOOP_RESULT
+    return await hooks.emit(event, data)
+
+
+def _has_handlers(hooks: HookRegistry, event: str) -> bool | None:
+    """Whether handlers are registered for an event, or None if the registry cannot tell."""
+    list_handlers = getattr(hooks, "list_handlers", None)
+    if list_handlers is None:
+        return None
+    return bool(list_handlers(event).get(event))
+
+
+def _batch_selection(call_id: str, decision: Any) -> HookResult:
+    """
+    Convert one tool:batch-selecting decision into a selection result.
+
+    Args:
+        call_id: Tool call id the decision belongs to
+        decision: Scheduler-supplied decision, or None
+
+    Returns:
+        Selection result; anything that is not a valid deny/modify decision continues
+    """
+    if decision is None:
+        return _NOOP_RESULT
+    action = decision.get("action") if isinstance(decision, dict) else None
+    reason = decision.get("reason") if isinstance(decision, dict) else None
+    if action == "deny":
+        return HookResult(action="deny", reason=reason if isinstance(reason, str) else None)
+    if action == "modify" and isinstance(decision.get("tool"), str):
+        return HookResult(action="modify", data={"tool": decision["tool"]})
+    if action not in (None, "continue"):
+        logger.warning("Ignoring invalid tool:batch-selecting decision for tool call %s: %r", call_id, decision)
+    return _NOOP_RESULT
+
+
+def _make_tool_result_msg(tool_name: str, call_id: str, content: Any) -> dict[str, Any]:
+    """Build the tool-role message answering a tool call."""
+    return {"role": "tool", "name": tool_name, "tool_call_id": call_id, "content": content}
+
+
+def _make_tool_error_msg(tool_name: str, call_id: str, reason: str) -> dict[str, Any]:
+    """Build the tool-role error message for a denied or failed tool call."""
+    return {"role": "tool", "name": tool_name, "tool_call_id": call_id, "content": f"Error: {reason}"}
+
+
+# Serializer resolved per result type, so the model_dump probe runs once per type
+_DUMP_CACHE: dict[type, Callable[[Any], Any]] = {}
+
+
+def _serialize_result(result: Any) -> Any:
+    """Serialize a tool result for hook payloads."""
+    result_type = type(result)
+    dump = _DUMP_CACHE.get(result_type)
+    if dump is None:
+        dump = result_type.model_dump if hasattr(result_type, "model_dump") else str
+        _DUMP_CACHE[result_type] = dump
+    return dump(result)
 
 
 class EventDrivenOrchestrator:
@@ -54,6 +189,47 @@ class EventDrivenOrchestrator:
         max_iter_config = config.get("max_iterations", -1)
         self.max_iterations = int(max_iter_config) if max_iter_config != -1 else -1
         self.default_provider = config.get("default_provider")
+        # (providers dict, its size, provider name, provider) from the last _select_provider call
+        self._provider_cache: tuple[dict[str, Any], int, str, Any] | None = None
+        # Maximum number of tool calls from one response executed concurrently (at least 1)
+        self.tool_concurrency = max(1, int(config.get("tool_concurrency", 8)))
+        # Serializes "ask_user" approvals from concurrently running tool calls
+        self._approval_lock = asyncio.Lock()
+        # Maximum number of sessions executed concurrently by execute_batch (at least 1)
+        self.batch_concurrency = max(1, int(config.get("batch_concurrency", 8)))
+        # Only ask the context whether to compact after this many new messages
+        self.compact_check_stride = int(config.get("compact_check_stride", 4))
+        # Opt-in: run provider.parse_tool_calls on a small private pool so heavy parsing
+        # does not block other sessions sharing the event loop. Providers must then be
+        # safe to call from a worker thread.
+        self._parse_executor: ThreadPoolExecutor | None = None
+        if config.get("offload_parsing", False):
+            self._parse_executor = ThreadPoolExecutor(
+                max_workers=int(config.get("parse_workers", 4)), thread_name_prefix="loop-events-parse"
+            )
+
+    def close(self) -> None:
+        """Release the parsing thread pool."""
+        if self._parse_executor is not None:
+            self._parse_executor.shutdown(wait=False)
+            self._parse_executor = None
+
+    async def _offload(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a synchronous call on the parsing pool, or inline if offloading is disabled.
+
+        Args:
+            func: Synchronous callable
+            *args: Positional arguments for func
+
+        Returns:
+            Result of func(*args)
+        """
+        if self._parse_executor is None:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(self._parse_executor, functools.partial(ctx.run, func, *args))
 
     async def execute(
         self,
@@ -76,8 +252,21 @@ class EventDrivenOrchestrator:
         Returns:
             Final response string
         """
+        # Select provider first so a misconfigured run returns before any hooks or context writes
+        provider = self._select_provider(providers)
+        if not provider:
+            return "Error: No providers available"
+
+        # Bind hot attributes to locals for the agent loop
+        max_iter = self.max_iterations
+        emit = functools.partial(_emit, hooks)
+        add_msg = context.add_message
+        get_msgs = context.get_messages
+        complete = provider.complete
+        parse_tc = provider.parse_tool_calls
+
         # Emit and process prompt submit (allows hooks to inject context before processing)
-        prompt_submit_result = await hooks.emit(PROMPT_SUBMIT, {"prompt": prompt})
+        prompt_submit_result = await emit(PROMPT_SUBMIT, {"prompt": prompt})
         if coordinator:
             prompt_submit_result = await coordinator.process_hook_result(
                 prompt_submit_result, "prompt:submit", "orchestrator"
@@ -86,85 +275,111 @@ class EventDrivenOrchestrator:
                 return f"Operation denied: {prompt_submit_result.reason}"
 
         # Emit session start
-        await hooks.emit("session:start", {"prompt": prompt})
-
-        # Add user message to context
-        await context.add_message({"role": "user", "content": prompt})
-
-        # Select provider
-        provider = self._select_provider(providers)
-        if not provider:
-            return "Error: No providers available"
+        await emit("session:start", {"prompt": prompt})
 
         iteration = 0
         final_response = ""
 
-        while self.max_iterations == -1 or iteration < self.max_iterations:
-            iteration += 1
+        try:
+            # Add user message to context
+            await add_msg({"role": "user", "content": prompt})
 
-            # Get messages from context
-            message_dicts = await context.get_messages()
-            message_dicts = list(message_dicts)  # Convert to list for modification
+            tool_semaphore = asyncio.Semaphore(self.tool_concurrency)
 
-            # Append ephemeral injection from prompt:submit if present (not stored in context)
-            if (
-                prompt_submit_result.action == "inject_context"
-                and prompt_submit_result.ephemeral
-                and prompt_submit_result.context_injection
-            ):
-                message_dicts.append(
-                    {
-                        "role": prompt_submit_result.context_injection_role,
-                        "content": prompt_submit_result.context_injection,
-                    }
-                )
+            # Snapshot tool names and ToolSpecs once instead of rebuilding them per iteration;
+            # the names are a tuple so every hook payload can share it safely
+            tools_keys = tuple(tools)
+            tools_list = self._build_tool_specs(tools)
 
-            # Convert dicts to ChatRequest for provider
-            messages_objects = [Message(**msg) for msg in message_dicts]
+            # Messages added since should_compact() last ran; starts at the stride so the
+            # first tool iteration of every turn always checks (the context may have grown
+            # across earlier turns)
+            msgs_since_compact_check = self.compact_check_stride
 
-            # Convert tools to ToolSpec format for ChatRequest
-            tools_list = None
-            if tools:
-                tools_list = [
-                    ToolSpec(name=t.name, description=t.description, parameters=t.input_schema) for t in tools.values()
-                ]
+            while max_iter == -1 or iteration < max_iter:
+                iteration += 1
 
-            chat_request = ChatRequest(messages=messages_objects, tools=tools_list)
+                # Get messages from context
+                message_dicts = await get_msgs()
+                message_dicts = list(message_dicts)  # Convert to list for modification
 
-            # Get completion from provider
-            try:
-                response = await provider.complete(chat_request)
-            except Exception as e:
-                logger.error(f"Provider error: {e}")
-                # Emit error event
-                await hooks.emit(
-                    "error:provider",
-                    {
-                        "error_type": "completion_failed",
-                        "error_message": str(e),
-                        "severity": "high",
-                    },
-                )
-                final_response = f"Error getting response: {e}"
-                break
-
-            # Check for tool calls
-            tool_calls = provider.parse_tool_calls(response)
-
-            if not tool_calls:
-                # No tool calls - we're done
-                # Extract text from content blocks
-                content = response.content
-                if isinstance(content, list):
-                    text_parts = []
-                    for block in content:
-                        if hasattr(block, "text"):
-                            text_parts.append(block.text)
-                        elif isinstance(block, dict) and "text" in block:
-                            text_parts.append(block["text"])
-                    final_response = "\n\n".join(text_parts) if text_parts else ""
-                else:
-                    final_response = content if content else ""
+                # Append ephemeral injection from prompt:submit if present (not stored in context)
+                if (
+                    prompt_submit_result.action == "inject_context"
+                    and prompt_submit_result.ephemeral
+                    and prompt_submit_result.context_injection
+                ):
+                    message_dicts.append(
+                        {
+                            "role": prompt_submit_result.context_injection_role,
+                            "content": prompt_submit_result.context_injection,
+                        }
+                    )
+
+                # Convert dicts to ChatRequest for provider
+                messages_objects = [Message(**msg) for msg in message_dicts]
+
+                # Rebuild the tool snapshot only if the tool set changed mid-session
+                if len(tools) != len(tools_keys):
+                    tools_keys = tuple(tools)
+                    tools_list = self._build_tool_specs(tools)
+
+                chat_request = ChatRequest(messages=messages_objects, tools=tools_list)
+
+                # Get completion from provider
+                try:
+                    response = await complete(chat_request)
+                except Exception as e:
+                    logger.error("Provider error: %s", e)
+                    # Emit error event
+                    await emit(
+                        "error:provider",
+                        {
+                            "error_type": "completion_failed",
+                            "error_message": str(e),
+                            "severity": "high",
+                        },
+                    )
+                    final_response = f"Error getting response: {e}"
+                    break
+
+                # Check for tool calls
+                tool_calls = await self._offload(parse_tc, response)
+
+                if not tool_calls:
+                    # No tool calls - we're done
+                    # Extract text from content blocks
+                    content = response.content
+                    if isinstance(content, list):
+                        text_parts = []
+                        for block in content:
+                            if hasattr(block, "text"):
+                                text_parts.append(block.text)
+                            elif isinstance(block, dict) and "text" in block:
+                                text_parts.append(block["text"])
+                        final_response = "\n\n".join(text_parts) if text_parts else ""
+                    else:
+                        final_response = content if content else ""
+                    # Store structured content from response.content (our Pydantic models)
+                    response_content = getattr(response, "content", None)
+                    if response_content and isinstance(response_content, list):
+                        assistant_msg = {
+                            "role": "assistant",
+                            "content": [
+                                block.model_dump() if hasattr(block, "model_dump") else block
+                                for block in response_content
+                            ],
+                        }
+                    else:
+                        assistant_msg = {"role": "assistant", "content": final_response}
+                    # Preserve provider metadata (provider-agnostic passthrough)
+                    if hasattr(response, "metadata") and response.metadata:
+                        assistant_msg["metadata"] = response.metadata
+                    await add_msg(assistant_msg)
+                    break
+
+                # Add assistant message with tool calls to context
+                tool_call_dicts = [{"tool": tc.name, "arguments": tc.arguments, "id": tc.id} for tc in tool_calls]
                 # Store structured content from response.content (our Pydantic models)
                 response_content = getattr(response, "content", None)
                 if response_content and isinstance(response_content, list):
@@ -173,276 +388,385 @@ class EventDrivenOrchestrator:
                         "content": [
                             block.model_dump() if hasattr(block, "model_dump") else block for block in response_content
                         ],
+                        "tool_calls": tool_call_dicts,
                     }
                 else:
-                    assistant_msg = {"role": "assistant", "content": final_response}
+                    assistant_msg = {
+                        "role": "assistant",
+                        "content": response.content if response.content else "",
+                        "tool_calls": tool_call_dicts,
+                    }
                 # Preserve provider metadata (provider-agnostic passthrough)
                 if hasattr(response, "metadata") and response.metadata:
                     assistant_msg["metadata"] = response.metadata
-                await context.add_message(assistant_msg)
-                break
-
-            # Add assistant message with tool calls to context
-            # Store structured content from response.content (our Pydantic models)
-            response_content = getattr(response, "content", None)
-            if response_content and isinstance(response_content, list):
-                assistant_msg = {
-                    "role": "assistant",
-                    "content": [
-                        block.model_dump() if hasattr(block, "model_dump") else block for block in response_content
+                await add_msg(assistant_msg)
+
+                # Let schedulers decide on the whole set at once if they subscribed to the batch event
+                selections = await self._select_tools_batch(tool_call_dicts, tools_keys, hooks)
+                if selections is None:
+                    selections = [None] * len(tool_calls)
+
+                # Execute tool calls concurrently, then add results in call order so every
+                # tool_call_id stays paired with its tool_result
+                results = await asyncio.gather(
+                    *[
+                        self._run_one_tool(tc, tools, tools_keys, hooks, coordinator, tool_semaphore, selection)
+                        for tc, selection in zip(tool_calls, selections, strict=True)
                     ],
-                    "tool_calls": [{"tool": tc.name, "arguments": tc.arguments, "id": tc.id} for tc in tool_calls],
-                }
-            else:
-                assistant_msg = {
-                    "role": "assistant",
-                    "content": response.content if response.content else "",
-                    "tool_calls": [{"tool": tc.name, "arguments": tc.arguments, "id": tc.id} for tc in tool_calls],
-                }
-            # Preserve provider metadata (provider-agnostic passthrough)
-            if hasattr(response, "metadata") and response.metadata:
-                assistant_msg["metadata"] = response.metadata
-            await context.add_message(assistant_msg)
-
-            # Execute tool calls
-            for tool_call in tool_calls:
-                # Trust LLM's selection
-                tool_name = tool_call.name
-
-                # Track if tool response was added to prevent orphaned tool calls
-                response_added = False
+                    return_exceptions=True,
+                )
+                for tool_call, tool_msg in zip(tool_calls, results, strict=True):
+                    if isinstance(tool_msg, BaseException):
+                        # Safety net: Ensure tool response is ALWAYS added to prevent orphaned tool calls
+                        logger.error("Unexpected error executing tool %s: %s", tool_call.name, tool_msg)
+                        tool_msg = _make_tool_result_msg(
+                            tool_call.name, tool_call.id, f"Internal error executing tool: {str(tool_msg)}"
+                        )
+                    try:
+                        await add_msg(tool_msg)
+                    except Exception as e:
+                        # Critical failure: Adding the tool response failed
+                        logger.error("Critical: Failed to add tool response for tool_call_id %s: %s", tool_call.id, e)
+
+                # Check if we should compact context: on the first tool iteration, then at most
+                # once every compact_check_stride messages
+                msgs_since_compact_check += 1 + len(tool_calls)
+                if msgs_since_compact_check >= self.compact_check_stride:
+                    msgs_since_compact_check = 0
+                    if await context.should_compact():
+                        await emit("context:pre-compact", {})
+                        await context.compact()
+
+            # Check if we exceeded max iterations (only if not unlimited)
+            if max_iter != -1 and iteration >= max_iter and not final_response:
+                logger.warning("Max iterations (%s) reached without final response", max_iter)
+
+                # Inject system reminder to agent before final response
+                await emit(
+                    "provider:request",
+                    {"provider": provider.__class__.__name__, "iteration": iteration, "max_reached": True},
+                )
+
+                # Get one final response with the reminder
+                message_dicts = await get_msgs()
+                message_dicts = list(message_dicts)
+                message_dicts.append(
+                    {
+                        "role": "system",
+                        "content": _MAX_ITERATIONS_REMINDER,
+                    }
+                )
 
                 try:
-                    # Optional: Allow schedulers to veto or modify
-                    hook_result = await hooks.emit(
+                    # Convert dicts to ChatRequest
+                    messages_objects = [Message(**msg) for msg in message_dicts]
+
+                    max_iter_chat_request = ChatRequest(messages=messages_objects, tools=tools_list)
+
+                    response = await complete(max_iter_chat_request)
+                    tool_calls = await self._offload(parse_tc, response)
+
+                    if not tool_calls:
+                        # Extract text from content blocks
+                        content = response.content
+                        if isinstance(content, list):
+                            text_parts = []
+                            for block in content:
+                                if hasattr(block, "text"):
+                                    text_parts.append(block.text)
+                                elif isinstance(block, dict) and "text" in block:
+                                    text_parts.append(block["text"])
+                            final_response = "\n\n".join(text_parts) if text_parts else ""
+                        else:
+                            final_response = content if content else ""
+                        await add_msg({"role": "assistant", "content": response.content})
+
+                except Exception as e:
+                    logger.error("Error getting final response after max iterations: %s", e)
+
+        finally:
+            # Emit session end on every exit path so listeners can close session state
+            await emit("session:end", {"response": final_response})
+
+        # Emit orchestrator complete event
+        await emit(
+            ORCHESTRATOR_COMPLETE,
+            {
+                "orchestrator": "loop-events",
+                "turn_count": iteration,
+                "status": "success" if final_response else "incomplete",
+            },
+        )
+
+        return final_response
+
+    async def execute_batch(
+        self,
+        prompts: list[str],
+        context_factory: Callable[[], Any],
+        providers: dict[str, Any],
+        tools: dict[str, Any],
+        hooks: HookRegistry,
+        coordinator: ModuleCoordinator | None = None,
+        max_concurrency: int | None = None,
+        return_exceptions: bool = False,
+    ) -> list[str | BaseException]:
+        """Execute independent sessions for many prompts concurrently.
+
+        Each prompt gets its own context from ``context_factory`` so sessions
+        share no mutable state. Providers, tools, and hooks are shared, so hook
+        handlers must be safe to run for several sessions at once.
+
+        Args:
+            prompts: User input prompts, one per session
+            context_factory: Callable returning a fresh context manager
+            providers: Available providers
+            tools: Available tools
+            hooks: Hook registry
+            coordinator: Optional module coordinator
+            max_concurrency: Maximum sessions in flight (defaults to batch_concurrency)
+            return_exceptions: Return a failing session's exception in its slot instead of
+                raising it; when False the first exception propagates and the results of
+                the other sessions are lost (they keep running to completion)
+
+        Returns:
+            Final response strings (or exceptions) in the same order as prompts
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or self.batch_concurrency))
+
+        async def _one(prompt: str) -> str:
+            async with semaphore:
+                return await self.execute(prompt, context_factory(), providers, tools, hooks, coordinator)
+
+        return await asyncio.gather(*[_one(p) for p in prompts], return_exceptions=return_exceptions)
+
+    async def _run_one_tool(
+        self,
+        tool_call: Any,
+        tools: dict[str, Any],
+        tool_names: tuple[str, ...],
+        hooks: HookRegistry,
+        coordinator: ModuleCoordinator | None,
+        semaphore: asyncio.Semaphore,
+        selection: HookResult | None = None,
+    ) -> dict[str, Any]:
+        """
+        Run a single tool call through its hooks and return the tool message.
+
+        Args:
+            tool_call: Tool call parsed from the provider response
+            tools: Available tools
+            tool_names: Names of available tools, reported to schedulers
+            hooks: Hook registry
+            coordinator: Optional module coordinator for hook result processing
+            semaphore: Bounds how many tool calls run at once
+            selection: Scheduler decision from tool:batch-selecting, replaces tool:selecting
+
+        Returns:
+            Tool-role message to add to context
+        """
+        async with semaphore:
+            # Trust LLM's selection
+            tool_name = tool_call.name
+
+            try:
+                # Optional: Allow schedulers to veto or modify
+                hook_result = selection
+                if hook_result is None:
+                    hook_result = await _emit(
+                        hooks,
                         "tool:selecting",
                         {
                             "tool_name": tool_name,
                             "tool_input": tool_call.arguments,
-                            "available_tools": list(tools.keys()),
+                            "available_tools": tool_names,
                         },
                     )
 
-                    if hook_result.action == "deny":
-                        logger.info(f"Tool {tool_name} vetoed: {hook_result.reason}")
-                        reason = hook_result.reason or "Tool execution denied by scheduler"
-                        await context.add_message(
-                            {
-                                "role": "tool",
-                                "name": tool_name,
-                                "tool_call_id": tool_call.id,
-                                "content": f"Error: {reason}",
-                            }
-                        )
-                        response_added = True
-                        continue
-                    if hook_result.action == "modify":
-                        original_tool = tool_name
-                        tool_name = hook_result.data.get("tool", tool_name) if hook_result.data else tool_name
-                        logger.info(f"Tool changed by scheduler: {original_tool} → {tool_name}")
-
-                    # Emit selection for logging (AFTER decision is made)
-                    await hooks.emit(
-                        "tool:selected",
+                if hook_result.action == "deny":
+                    logger.info("Tool %s vetoed: %s", tool_name, hook_result.reason)
+                    reason = hook_result.reason or "Tool execution denied by scheduler"
+                    return _make_tool_error_msg(tool_name, tool_call.id, reason)
+                if hook_result.action == "modify":
+                    original_tool = tool_name
+                    tool_name = hook_result.data.get("tool", tool_name) if hook_result.data else tool_name
+                    logger.info("Tool changed by scheduler: %s -> %s", original_tool, tool_name)
+
+                # Emit selection for logging (AFTER decision is made)
+                await _emit(
+                    hooks,
+                    "tool:selected",
+                    {
+                        "tool": tool_name,
+                        "source": "scheduler" if hook_result.action == "modify" else "llm",
+                        "original_tool": tool_call.name if hook_result.action == "modify" else None,
+                    },
+                )
+
+                # Get tool object first to pass to hook
+                tool = tools.get(tool_name)
+
+                # Pre-tool hook
+                pre_result = await _emit(
+                    hooks,
+                    TOOL_PRE,
+                    {
+                        "tool_name": tool_name,
+                        "tool_input": tool_call.arguments,
+                    },
+                )
+                if coordinator:
+                    pre_result = await self._process_tool_hook_result(coordinator, pre_result, "tool:pre", tool_name)
+                    if pre_result.action == "deny":
+                        # Tool denied by hook - MUST add tool_result for API compliance
+                        reason = pre_result.reason or "Tool execution denied"
+                        return _make_tool_error_msg(tool_name, tool_call.id, reason)
+
+                # Check if tool exists (we already got it earlier for the hook)
+                if not tool:
+                    # Emit error event
+                    await _emit(
+                        hooks,
+                        "error:tool",
                         {
-                            "tool": tool_name,
-                            "source": "scheduler" if hook_result.action == "modify" else "llm",
-                            "original_tool": tool_call.name if hook_result.action == "modify" else None,
+                            "error_type": "tool_not_found",
+                            "error_message": f"Tool {tool_name} not found",
+                            "severity": "medium",
                         },
                     )
+                    # Tool not found - MUST add tool_result for API compliance
+                    return _make_tool_error_msg(tool_name, tool_call.id, f"Tool {tool_name} not found")
 
-                    # Get tool object first to pass to hook
-                    tool = tools.get(tool_name)
-
-                    # Pre-tool hook
-                    pre_result = await hooks.emit(
-                        TOOL_PRE,
+                # Execute tool
+                try:
+                    result = await tool.execute(tool_call.arguments)
+                except Exception as e:
+                    logger.error("Tool execution error: %s", e)
+                    result = ToolResult(success=False, error={"message": str(e)})
+                    # Emit error event
+                    await _emit(
+                        hooks,
+                        "error:tool",
                         {
-                            "tool_name": tool_name,
-                            "tool_input": tool_call.arguments,
+                            "error_type": "execution_failed",
+                            "error_message": str(e),
+                            "tool": tool_name,
+                            "severity": "high",
                         },
                     )
-                    if coordinator:
-                        pre_result = await coordinator.process_hook_result(pre_result, "tool:pre", tool_name)
-                        if pre_result.action == "deny":
-                            # Tool denied by hook - MUST add tool_result for API compliance
-                            reason = pre_result.reason or "Tool execution denied"
-                            await context.add_message(
-                                {
-                                    "role": "tool",
-                                    "name": tool_name,
-                                    "tool_call_id": tool_call.id,
-                                    "content": f"Error: {reason}",
-                                }
-                            )
-                            response_added = True
-                            continue
-
-                    # Check if tool exists (we already got it earlier for the hook)
-                    if not tool:
-                        # Tool not found - MUST add tool_result for API compliance
-                        await context.add_message(
-                            {
-                                "role": "tool",
-                                "name": tool_name,
-                                "tool_call_id": tool_call.id,
-                                "content": f"Error: Tool {tool_name} not found",
-                            }
-                        )
-                        response_added = True
-                        # Emit error event
-                        await hooks.emit(
-                            "error:tool",
-                            {
-                                "error_type": "tool_not_found",
-                                "error_message": f"Tool {tool_name} not found",
-                                "severity": "medium",
-                            },
-                        )
-                        continue
 
-                    # Execute tool
-                    try:
-                        result = await tool.execute(tool_call.arguments)
-                    except Exception as e:
-                        logger.error(f"Tool execution error: {e}")
-                        result = ToolResult(success=False, error={"message": str(e)})
-                        # Emit error event
-                        await hooks.emit(
-                            "error:tool",
-                            {
-                                "error_type": "execution_failed",
-                                "error_message": str(e),
-                                "tool": tool_name,
-                                "severity": "high",
-                            },
-                        )
+                # Serialize result for logging
+                result_data = _serialize_result(result)
 
-                    # Serialize result for logging
-                    result_data = result.model_dump() if hasattr(result, "model_dump") else str(result)
+                # Post-tool hook
+                post_result = await _emit(
+                    hooks,
+                    TOOL_POST,
+                    {
+                        "tool_name": tool_name,
+                        "tool_input": tool_call.arguments,
+                        "result": result_data,
+                    },
+                )
+                if coordinator:
+                    await self._process_tool_hook_result(coordinator, post_result, "tool:post", tool_name)
 
-                    # Post-tool hook
-                    post_result = await hooks.emit(
-                        TOOL_POST,
-                        {
-                            "tool_name": tool_name,
-                            "tool_input": tool_call.arguments,
-                            "result": result_data,
-                        },
-                    )
-                    if coordinator:
-                        await coordinator.process_hook_result(post_result, "tool:post", tool_name)
+                # Tool result for context (JSON-serialized for dict/list outputs)
+                return _make_tool_result_msg(tool_name, tool_call.id, result.get_serialized_output())
 
-                    # Add tool result to context (JSON-serialized for dict/list outputs)
-                    await context.add_message(
-                        {
-                            "role": "tool",
-                            "name": tool_name,
-                            "tool_call_id": tool_call.id,
-                            "content": result.get_serialized_output(),
-                        }
-                    )
-                    response_added = True
+            except Exception as e:
+                # Safety net: Ensure tool response is ALWAYS produced to prevent orphaned tool calls
+                logger.error("Unexpected error executing tool %s: %s", tool_name, e, exc_info=True)
+                return _make_tool_result_msg(tool_name, tool_call.id, f"Internal error executing tool: {str(e)}")
 
-                except Exception as e:
-                    # Safety net: Ensure tool response is ALWAYS added to prevent orphaned tool calls
-                    logger.error(f"Unexpected error executing tool {tool_name}: {e}", exc_info=True)
-
-                    if not response_added:
-                        try:
-                            await context.add_message(
-                                {
-                                    "role": "tool",
-                                    "name": tool_name,
-                                    "tool_call_id": tool_call.id,
-                                    "content": f"Internal error executing tool: {str(e)}",
-                                }
-                            )
-                        except Exception as inner_e:
-                            # Critical failure: Even adding error response failed
-                            logger.error(
-                                f"Critical: Failed to add error response for tool_call_id {tool_call.id}: {inner_e}"
-                            )
-
-                    # Continue processing remaining tools - don't let one failure stop all tools
-                    continue
-
-            # Check if we should compact context
-            if await context.should_compact():
-                await hooks.emit("context:pre-compact", {})
-                await context.compact()
-
-        # Check if we exceeded max iterations (only if not unlimited)
-        if self.max_iterations != -1 and iteration >= self.max_iterations and not final_response:
-            logger.warning(f"Max iterations ({self.max_iterations}) reached without final response")
-
-            # Inject system reminder to agent before final response
-            await hooks.emit(
-                "provider:request",
-                {"provider": provider.__class__.__name__, "iteration": iteration, "max_reached": True},
-            )
+    async def _process_tool_hook_result(
+        self,
+        coordinator: ModuleCoordinator,
+        result: HookResult,
+        event: str,
+        tool_name: str,
+    ) -> HookResult:
+        """
+        Process a tool hook result, one user approval at a time.
 
-            # Get one final response with the reminder
-            message_dicts = await context.get_messages()
-            message_dicts = list(message_dicts)
-            message_dicts.append(
-                {
-                    "role": "system",
-                    "content": """<system-reminder>
-You have reached the maximum number of iterations for this turn. Please provide a response to the user now, summarizing your progress and noting what remains to be done. You can continue in the next turn if needed.
-</system-reminder>""",
-                }
-            )
+        Tool calls run concurrently, so "ask_user" results are serialized to avoid
+        several interactive approval prompts being open at once.
 
-            try:
-                # Convert dicts to ChatRequest
-                messages_objects = [Message(**msg) for msg in message_dicts]
+        Args:
+            coordinator: Module coordinator
+            result: Hook result to process
+            event: Hook event name
+            tool_name: Tool the result belongs to
 
-                # Convert tools to ToolSpec format for ChatRequest
-                tools_list = None
-                if tools:
-                    tools_list = [
-                        ToolSpec(name=t.name, description=t.description, parameters=t.input_schema)
-                        for t in tools.values()
-                    ]
+        Returns:
+            Processed hook result
+        """
+        if result.action == "ask_user":
+            async with self._approval_lock:
+                return await coordinator.process_hook_result(result, event, tool_name)
+        return await coordinator.process_hook_result(result, event, tool_name)
 
-                max_iter_chat_request = ChatRequest(messages=messages_objects, tools=tools_list)
+    async def _select_tools_batch(
+        self,
+        tool_call_dicts: list[dict[str, Any]],
+        tool_names: tuple[str, ...],
+        hooks: HookRegistry,
+    ) -> list[HookResult] | None:
+        """
+        Ask schedulers about all tool calls of a response with one tool:batch-selecting event.
 
-                response = await provider.complete(max_iter_chat_request)
-                tool_calls = provider.parse_tool_calls(response)
+        A "deny" result vetoes every call. To decide per call, handlers return
+        action="modify" with data={"decisions": {tool_call_id: decision}} (the registry
+        only passes handler data through for "modify"), where each decision is
+        {"action": "deny", "reason": ...} or {"action": "modify", "tool": ...}.
+        Calls without a decision, or with an invalid one, continue unchanged; a
+        malformed decisions map falls back to per-call tool:selecting.
 
-                if not tool_calls:
-                    # Extract text from content blocks
-                    content = response.content
-                    if isinstance(content, list):
-                        text_parts = []
-                        for block in content:
-                            if hasattr(block, "text"):
-                                text_parts.append(block.text)
-                            elif isinstance(block, dict) and "text" in block:
-                                text_parts.append(block["text"])
-                        final_response = "\n\n".join(text_parts) if text_parts else ""
-                    else:
-                        final_response = content if content else ""
-                    await context.add_message({"role": "assistant", "content": response.content})
+        Args:
+            tool_call_dicts: Tool calls as {"tool", "arguments", "id"} dicts
+            tool_names: Names of available tools
+            hooks: Hook registry
 
-            except Exception as e:
-                logger.error(f"Error getting final response after max iterations: {e}")
+        Returns:
+            One selection result per tool call, or None to use per-call tool:selecting
+        """
+        if not _has_handlers(hooks, "tool:batch-selecting"):
+            return None
 
-        # Emit session end
-        await hooks.emit("session:end", {"response": final_response})
+        try:
+            batch_result = await hooks.emit(
+                "tool:batch-selecting",
+                {
+                    "tool_calls": tool_call_dicts,
+                    "available_tools": tool_names,
+                },
+            )
+        except Exception as e:
+            logger.error("Batch tool selection failed, falling back to per-call selection: %s", e)
+            return None
 
-        # Emit orchestrator complete event
-        await hooks.emit(
-            ORCHESTRATOR_COMPLETE,
-            {
-                "orchestrator": "loop-events",
-                "turn_count": iteration,
-                "status": "success" if final_response else "incomplete",
-            },
-        )
+        if batch_result.action == "deny":
+            return [HookResult(action="deny", reason=batch_result.reason)] * len(tool_call_dicts)
 
-        return final_response
+        decisions = (batch_result.data or {}).get("decisions") or {}
+        if not isinstance(decisions, dict):
+            logger.warning("Ignoring malformed tool:batch-selecting decisions, falling back to per-call selection")
+            return None
+        return [_batch_selection(tc["id"], decisions.get(tc["id"])) for tc in tool_call_dicts]
+
+    def _build_tool_specs(self, tools: dict[str, Any]) -> list[ToolSpec] | None:
+        """
+        Convert tools to ToolSpec format for ChatRequest.
+
+        Args:
+            tools: Available tools
+
+        Returns:
+            List of tool specs, or None if there are no tools
+        """
+        if not tools:
+            return None
+        return [ToolSpec(name=t.name, description=t.description, parameters=t.input_schema) for t in tools.values()]
 
     def _select_provider(self, providers: dict[str, Any]) -> Any:
         """
@@ -457,9 +781,25 @@ You have reached the maximum number of iterations for this turn. Please provide
         if not providers:
             return None
 
+        # Reuse the last selection while the same (unchanged-size) providers dict is passed in
+        # and the cached name still maps to the cached provider (catches remounts)
+        cached = self._provider_cache
+        if (
+            cached is not None
+            and cached[0] is providers
+            and cached[1] == len(providers)
+            and providers.get(cached[2]) is cached[3]
+        ):
+            return cached[3]
+
         # Use configured default if available
         if self.default_provider and self.default_provider in providers:
-            return providers[self.default_provider]
-
-        # Otherwise use first available
-        return next(iter(providers.values()))
+            name = self.default_provider
+        else:
+            # Otherwise use first available
+            name = next(iter(providers))
+        provider = providers[name]
+
+        self._provider_cache = (providers, len(providers), name, provider)
+        logger.debug("Selected provider: %s", name)
+        return provider
@@ -4,10 +4,12 @@ These models handle scheduler decisions for tools, agents, and context managemen
 """
 
 from dataclasses import dataclass
+from dataclasses import field
+from sys import intern
 from typing import Any
 
 
-@dataclass
+@dataclass(slots=True)
 class DecisionRequest:
     """Base class for decision request events."""
 
@@ -17,7 +19,7 @@ class DecisionRequest:
     metadata: dict[str, Any]
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolResolutionRequest(DecisionRequest):
     """Request for tool selection decision."""
 
@@ -25,7 +27,7 @@ class ToolResolutionRequest(DecisionRequest):
     context: dict[str, Any]
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolResolutionResponse:
     """Response from scheduler with tool selection."""
 
@@ -35,7 +37,7 @@ class ToolResolutionResponse:
     metadata: dict[str, Any]
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentResolutionRequest(DecisionRequest):
     """Request for agent selection decision."""
 
@@ -44,7 +46,7 @@ class AgentResolutionRequest(DecisionRequest):
     context: dict[str, Any]
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentResolutionResponse:
     """Response from scheduler with agent selection."""
 
@@ -54,7 +56,7 @@ class AgentResolutionResponse:
     metadata: dict[str, Any]
 
 
-@dataclass
+@dataclass(slots=True)
 class ContextResolutionRequest(DecisionRequest):
     """Request for context management decision."""
 
@@ -64,7 +66,7 @@ class ContextResolutionRequest(DecisionRequest):
     metadata: dict[str, Any]
 
 
-@dataclass
+@dataclass(slots=True)
 class ContextResolutionResponse:
     """Response from scheduler with context management decision."""
 
@@ -74,9 +76,13 @@ class ContextResolutionResponse:
     metadata: dict[str, Any]
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ErrorEvent:
-    """Structured error event for telemetry."""
+    """Structured error event for telemetry.
+
+    Frozen and hashable (metadata is excluded from the hash) so events can be
+    shared or deduplicated; error_type and severity are interned.
+    """
 
     error_type: str  # "tool_failure", "timeout", "validation", etc.
     error_code: str | None
@@ -86,4 +92,8 @@ class ErrorEvent:
     recovery_successful: bool
     fallback_used: str | None
     severity: str  # "low", "medium", "high", "critical"
-    metadata: dict[str, Any]
+    metadata: dict[str, Any] = field(hash=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "error_type", intern(self.error_type))
+        object.__setattr__(self, "severity", intern(self.severity))
@@ -0,0 +1,488 @@
+"""Module-specific tests for the loop-events orchestrator."""
+
+import asyncio
+import sys
+import threading
+import time
+
+import pytest
+from amplifier_core import HookResult
+from amplifier_core import ToolResult
+from amplifier_core.message_models import ChatResponse
+from amplifier_core.message_models import TextBlock
+from amplifier_core.message_models import ToolCall
+from amplifier_core.testing import EventRecorder
+
+from amplifier_module_loop_events import EventDrivenOrchestrator
+from amplifier_module_loop_events import fast_event_loop_factory
+from amplifier_module_loop_events import install_fast_event_loop
+
+
+class FakeContext:
+    """In-memory context manager that counts compaction checks."""
+
+    def __init__(self):
+        self.messages = []
+        self.compact_checks = 0
+        self.compactions = 0
+
+    async def add_message(self, message):
+        self.messages.append(message)
+
+    async def get_messages(self):
+        return list(self.messages)
+
+    async def should_compact(self):
+        self.compact_checks += 1
+        return False
+
+    async def compact(self):
+        self.compactions += 1
+
+
+class FakeTool:
+    """Tool that sleeps before returning (or raising)."""
+
+    def __init__(self, name, delay=0.0, error=None):
+        self.name = name
+        self.description = f"{name} tool"
+        self.input_schema = {"type": "object", "properties": {}}
+        self.delay = delay
+        self.error = error
+
+    async def execute(self, arguments):
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise RuntimeError(self.error)
+        return ToolResult(success=True, output=f"{self.name} done")
+
+
+class ScriptedProvider:
+    """Provider that returns the given tool calls once, then a text response."""
+
+    def __init__(self, tool_calls=None, text="done"):
+        self.tool_calls = list(tool_calls or [])
+        self.text = text
+
+    async def complete(self, request, **kwargs):
+        if self.tool_calls:
+            calls, self.tool_calls = self.tool_calls, []
+            return ChatResponse(content=[TextBlock(text="calling tools")], tool_calls=calls)
+        return ChatResponse(content=[TextBlock(text=self.text)])
+
+    def parse_tool_calls(self, response):
+        return response.tool_calls or []
+
+
+def _tool_messages(context):
+    return [m for m in context.messages if m["role"] == "tool"]
+
+
+@pytest.mark.asyncio
+async def test_tool_results_added_in_call_order():
+    """Results are appended in tool call order even when later calls finish first."""
+    calls = [
+        ToolCall(id="1", name="slow", arguments={}),
+        ToolCall(id="2", name="fast", arguments={}),
+        ToolCall(id="3", name="missing", arguments={}),
+    ]
+    tools = {"slow": FakeTool("slow", delay=0.05), "fast": FakeTool("fast")}
+    context = FakeContext()
+
+    result = await EventDrivenOrchestrator({}).execute(
+        "hi", context, {"p": ScriptedProvider(calls)}, tools, EventRecorder()
+    )
+
+    assert result == "done"
+    tool_msgs = _tool_messages(context)
+    assert [m["tool_call_id"] for m in tool_msgs] == ["1", "2", "3"]
+    assert tool_msgs[0]["content"] == "slow done"
+    assert tool_msgs[2]["content"] == "Error: Tool missing not found"
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_run_concurrently():
+    """Wall-clock time of one iteration is close to the slowest tool, not the sum."""
+    calls = [ToolCall(id=str(i), name="sleepy", arguments={}) for i in range(4)]
+    tools = {"sleepy": FakeTool("sleepy", delay=0.2)}
+
+    start = time.perf_counter()
+    await EventDrivenOrchestrator({}).execute(
+        "hi", FakeContext(), {"p": ScriptedProvider(calls)}, tools, EventRecorder()
+    )
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.5  # sequential execution would take 0.8s
+
+
+@pytest.mark.asyncio
+async def test_failing_tool_run_still_adds_tool_result():
+    """If _run_one_tool raises, the safety net still answers that tool call."""
+    calls = [ToolCall(id="1", name="ok", arguments={}), ToolCall(id="2", name="ok", arguments={})]
+    orchestrator = EventDrivenOrchestrator({})
+    run_one_tool = orchestrator._run_one_tool
+
+    async def flaky_run_one_tool(tool_call, *args):
+        if tool_call.id == "2":
+            raise RuntimeError("kaboom")
+        return await run_one_tool(tool_call, *args)
+
+    orchestrator._run_one_tool = flaky_run_one_tool
+    context = FakeContext()
+
+    result = await orchestrator.execute(
+        "hi", context, {"p": ScriptedProvider(calls)}, {"ok": FakeTool("ok")}, EventRecorder()
+    )
+
+    assert result == "done"
+    tool_msgs = _tool_messages(context)
+    assert [m["tool_call_id"] for m in tool_msgs] == ["1", "2"]
+    assert tool_msgs[0]["content"] == "ok done"
+    assert tool_msgs[1]["content"] == "Internal error executing tool: kaboom"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("concurrency", [0, -3])
+async def test_non_positive_tool_concurrency_is_clamped(concurrency):
+    """tool_concurrency below 1 must not deadlock or raise."""
+    calls = [ToolCall(id="1", name="ok", arguments={})]
+    orchestrator = EventDrivenOrchestrator({"tool_concurrency": concurrency})
+
+    result = await asyncio.wait_for(
+        orchestrator.execute(
+            "hi", FakeContext(), {"p": ScriptedProvider(calls)}, {"ok": FakeTool("ok")}, EventRecorder()
+        ),
+        timeout=5,
+    )
+
+    assert orchestrator.tool_concurrency == 1
+    assert result == "done"
+
+
+class TrackingProvider:
+    """Provider that echoes the prompt and records how many calls overlap."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def complete(self, request, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            prompt = request.messages[0].content
+            if prompt == "fail":
+                raise RuntimeError("provider down")
+            return ChatResponse(content=[TextBlock(text=f"echo {prompt}")])
+        finally:
+            self.in_flight -= 1
+
+    def parse_tool_calls(self, response):
+        return []
+
+
+@pytest.mark.asyncio
+async def test_execute_batch_preserves_order_and_bounds_concurrency():
+    """Responses come back in prompt order with at most max_concurrency sessions in flight."""
+    provider = TrackingProvider()
+    prompts = [f"p{i}" for i in range(6)]
+
+    results = await EventDrivenOrchestrator({}).execute_batch(
+        prompts, FakeContext, {"p": provider}, {}, EventRecorder(), max_concurrency=2
+    )
+
+    assert results == [f"echo {p}" for p in prompts]
+    assert provider.max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_execute_batch_return_exceptions():
+    """With return_exceptions=True a failing session does not discard the others."""
+
+    class FailingContext(FakeContext):
+        async def get_messages(self):
+            raise RuntimeError("context down")
+
+    contexts = iter([FakeContext(), FailingContext(), FakeContext()])
+    orchestrator = EventDrivenOrchestrator({})
+
+    results = await orchestrator.execute_batch(
+        ["a", "b", "c"], lambda: next(contexts), {"p": TrackingProvider()}, {}, EventRecorder(), return_exceptions=True
+    )
+
+    assert results[0] == "echo a"
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] == "echo c"
+
+
+@pytest.mark.asyncio
+async def test_parse_tool_calls_offloaded_only_when_enabled():
+    """parse_tool_calls runs on the loop thread by default and on a worker when offloading is on."""
+
+    class ThreadRecordingProvider(ScriptedProvider):
+        def parse_tool_calls(self, response):
+            self.parse_thread = threading.current_thread()
+            return super().parse_tool_calls(response)
+
+    for config, expect_main in (({}, True), ({"offload_parsing": True}, False)):
+        provider = ThreadRecordingProvider()
+        orchestrator = EventDrivenOrchestrator(config)
+        try:
+            await orchestrator.execute("hi", FakeContext(), {"p": provider}, {}, EventRecorder())
+        finally:
+            orchestrator.close()
+        assert (provider.parse_thread is threading.main_thread()) is expect_main
+
+
+class MultiStepProvider:
+    """Provider that requests one tool call for the given number of steps, then answers."""
+
+    def __init__(self, steps):
+        self.steps = steps
+        self.calls = 0
+
+    async def complete(self, request, **kwargs):
+        self.calls += 1
+        if self.calls <= self.steps:
+            call = ToolCall(id=f"call-{self.calls}", name="ok", arguments={})
+            return ChatResponse(content=[TextBlock(text="working")], tool_calls=[call])
+        return ChatResponse(content=[TextBlock(text="done")])
+
+    def parse_tool_calls(self, response):
+        return response.tool_calls or []
+
+
+@pytest.mark.asyncio
+async def test_compaction_checked_every_turn_on_shared_context():
+    """Short turns on a shared context still reach should_compact() once per turn."""
+    context = FakeContext()
+    orchestrator = EventDrivenOrchestrator({})
+
+    for _ in range(10):
+        await orchestrator.execute(
+            "hi", context, {"p": MultiStepProvider(steps=1)}, {"ok": FakeTool("ok")}, EventRecorder()
+        )
+
+    assert context.compact_checks == 10
+    assert len(context.messages) == 40
+
+
+@pytest.mark.asyncio
+async def test_compaction_check_stride_within_turn():
+    """Within a long turn, checks after the first follow compact_check_stride."""
+    context = FakeContext()
+
+    await EventDrivenOrchestrator({"compact_check_stride": 4}).execute(
+        "hi", context, {"p": MultiStepProvider(steps=5)}, {"ok": FakeTool("ok")}, EventRecorder()
+    )
+
+    # Iterations 1, 3 and 5 check (each tool iteration adds two messages)
+    assert context.compact_checks == 3
+
+
+def test_select_provider_sees_remounted_provider():
+    """Replacing a provider under the same name invalidates the selection cache."""
+    orchestrator = EventDrivenOrchestrator({})
+    old, new = object(), object()
+    providers = {"p": old}
+
+    assert orchestrator._select_provider(providers) is old
+    providers["p"] = new
+    assert orchestrator._select_provider(providers) is new
+
+
+class BatchSelectingHooks(EventRecorder):
+    """Recorder that reports a tool:batch-selecting handler and returns a fixed result for it."""
+
+    def __init__(self, batch_result):
+        super().__init__()
+        self.batch_result = batch_result
+
+    def list_handlers(self, event=None):
+        return {event: ["batch"] if event == "tool:batch-selecting" else []}
+
+    async def emit(self, event, data):
+        await super().emit(event, data)
+        if event == "tool:batch-selecting":
+            return self.batch_result
+        return HookResult(action="continue")
+
+
+BATCH_CALLS = [
+    ToolCall(id="1", name="slow", arguments={}),
+    ToolCall(id="2", name="fast", arguments={}),
+    ToolCall(id="3", name="fast", arguments={}),
+]
+
+
+@pytest.mark.asyncio
+async def test_batch_selecting_applies_decisions():
+    """Per-call decisions from tool:batch-selecting veto or redirect calls without tool:selecting."""
+    hooks = BatchSelectingHooks(
+        HookResult(
+            action="modify",
+            data={
+                "decisions": {"1": {"action": "deny", "reason": "too slow"}, "3": {"action": "modify", "tool": "slow"}}
+            },
+        )
+    )
+    context = FakeContext()
+    tools = {"slow": FakeTool("slow"), "fast": FakeTool("fast")}
+
+    await EventDrivenOrchestrator({}).execute("hi", context, {"p": ScriptedProvider(BATCH_CALLS)}, tools, hooks)
+
+    assert [m["content"] for m in _tool_messages(context)] == ["Error: too slow", "fast done", "slow done"]
+    assert len(hooks.get_events("tool:batch-selecting")) == 1
+    assert hooks.get_events("tool:selecting") == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "decisions",
+    [
+        {"1": {"action": "allow"}, "2": "deny", "3": {"action": "modify", "tool": 42}},
+        ["deny", "deny", "deny"],
+    ],
+)
+async def test_batch_selecting_ignores_invalid_decisions(decisions):
+    """Malformed decisions never break execute() and every tool call still gets its result."""
+    hooks = BatchSelectingHooks(HookResult(action="modify", data={"decisions": decisions}))
+    context = FakeContext()
+    tools = {"slow": FakeTool("slow"), "fast": FakeTool("fast")}
+
+    result = await EventDrivenOrchestrator({}).execute(
+        "hi", context, {"p": ScriptedProvider(BATCH_CALLS)}, tools, hooks
+    )
+
+    assert result == "done"
+    assert [m["content"] for m in _tool_messages(context)] == ["slow done", "fast done", "fast done"]
+
+
+@pytest.mark.asyncio
+async def test_max_iterations_reminder_is_not_indented():
+    """The reminder sent after max_iterations keeps its tags and text at column 0."""
+
+    class RecordingProvider(MultiStepProvider):
+        async def complete(self, request, **kwargs):
+            self.last_request = request
+            return await super().complete(request, **kwargs)
+
+    provider = RecordingProvider(steps=10)
+
+    await EventDrivenOrchestrator({"max_iterations": 1}).execute(
+        "hi", FakeContext(), {"p": provider}, {"ok": FakeTool("ok")}, EventRecorder()
+    )
+
+    reminder = provider.last_request.messages[-1]
+    assert reminder.role == "system"
+    assert all(not line.startswith(" ") for line in reminder.content.splitlines())
+    assert reminder.content.endswith("\n</system-reminder>")
+
+
+@pytest.mark.asyncio
+async def test_ask_user_approvals_are_serialized():
+    """Concurrent tool calls never have more than one ask_user approval in flight."""
+
+    class AskUserHooks(EventRecorder):
+        async def emit(self, event, data):
+            await super().emit(event, data)
+            if event == "tool:pre":
+                return HookResult(action="ask_user", approval_prompt="Allow?")
+            return HookResult(action="continue")
+
+    class ApprovingCoordinator:
+        def __init__(self):
+            self.in_flight = 0
+            self.max_in_flight = 0
+
+        async def process_hook_result(self, result, event, source):
+            if result.action != "ask_user":
+                return result
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            return HookResult(action="continue")
+
+    calls = [ToolCall(id=str(i), name="ok", arguments={}) for i in range(4)]
+    coordinator = ApprovingCoordinator()
+    context = FakeContext()
+
+    await EventDrivenOrchestrator({}).execute(
+        "hi", context, {"p": ScriptedProvider(calls)}, {"ok": FakeTool("ok")}, AskUserHooks(), coordinator
+    )
+
+    assert coordinator.max_in_flight == 1
+    assert [m["content"] for m in _tool_messages(context)] == ["ok done"] * 4
+
+
+@pytest.mark.asyncio
+async def test_tool_mounted_mid_session_is_offered_next_iteration():
+    """A tool added to the tools dict during a turn shows up in the next request and payloads."""
+    tools = {}
+
+    class MountingTool(FakeTool):
+        async def execute(self, arguments):
+            tools["late"] = FakeTool("late")
+            return await super().execute(arguments)
+
+    tools["mounter"] = MountingTool("mounter")
+
+    class RequestRecordingProvider:
+        def __init__(self):
+            self.requests = []
+
+        async def complete(self, request, **kwargs):
+            self.requests.append(request)
+            step = len(self.requests)
+            if step == 1:
+                return ChatResponse(content=[], tool_calls=[ToolCall(id="1", name="mounter", arguments={})])
+            if step == 2:
+                return ChatResponse(content=[], tool_calls=[ToolCall(id="2", name="late", arguments={})])
+            return ChatResponse(content=[TextBlock(text="done")])
+
+        def parse_tool_calls(self, response):
+            return response.tool_calls or []
+
+    provider = RequestRecordingProvider()
+    hooks = EventRecorder()
+    context = FakeContext()
+
+    await EventDrivenOrchestrator({}).execute("hi", context, {"p": provider}, tools, hooks)
+
+    assert [t.name for t in provider.requests[0].tools] == ["mounter"]
+    assert [t.name for t in provider.requests[1].tools] == ["mounter", "late"]
+    selecting = hooks.get_events("tool:selecting")
+    assert list(selecting[0][1]["available_tools"]) == ["mounter"]
+    assert list(selecting[1][1]["available_tools"]) == ["mounter", "late"]
+    assert _tool_messages(context)[1]["content"] == "late done"
+
+
+def test_install_fast_event_loop_noop_on_windows(monkeypatch):
+    """install_fast_event_loop() leaves the policy alone on Windows."""
+    monkeypatch.setattr(sys, "platform", "win32")
+
+    assert fast_event_loop_factory() is None
+    assert install_fast_event_loop() is False
+
+
+def test_install_fast_event_loop_noop_without_uvloop(monkeypatch):
+    """install_fast_event_loop() leaves the policy alone when uvloop is not installed."""
+    monkeypatch.setattr(sys, "platform", "linux")
+    monkeypatch.setitem(sys.modules, "uvloop", None)
+    policy = asyncio.get_event_loop_policy()
+
+    assert fast_event_loop_factory() is None
+    assert install_fast_event_loop() is False
+    assert asyncio.get_event_loop_policy() is policy
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uvloop does not support Windows")
+def test_fast_event_loop_factory_runs_uvloop():
+    """With uvloop installed, the factory makes asyncio.Runner use a uvloop loop."""
+    uvloop = pytest.importorskip("uvloop")
+
+    with asyncio.Runner(loop_factory=fast_event_loop_factory()) as runner:
+        assert isinstance(runner.get_loop(), uvloop.Loop)